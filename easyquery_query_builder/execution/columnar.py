@@ -0,0 +1,220 @@
+from array import array
+from itertools import repeat
+from typing import Any
+
+from easyvalid_data_validator.constraints import Constraint
+from easyvalid_data_validator.validator import validate_json_data
+
+from easyquery_query_builder.queries.query import Query
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# kinds of column values, int and float can be merged into float, any other mix is widened to objects
+_INT, _FLOAT, _BOOL, _OBJECT = 0, 1, 2, 3
+_ARRAY_TYPECODES = {_INT: "q", _FLOAT: "d"}
+_NUMPY_DTYPES = {_INT: "int64", _FLOAT: "float64", _BOOL: "bool", _OBJECT: "object"}
+# ints above this value can't be represented exactly as floats
+_MAX_EXACT_FLOAT_INT = 2 ** 53
+
+
+def _merge_kinds(kind: int, other: int) -> int:
+    """ Returns the narrowest kind that is able to hold values of both kinds """
+    if kind == other:
+        return kind
+    if {kind, other} == {_INT, _FLOAT}:
+        return _FLOAT
+    return _OBJECT
+
+
+def _kind_of(values: list) -> tuple[int, bool]:
+    """ Returns the narrowest kind that is able to hold all provided values and whether any int is too large for float """
+    kind, large_int = None, False
+    for value in values:
+        value_type = type(value)
+        if value_type is int:
+            value_kind = _INT
+            large_int = large_int or abs(value) > _MAX_EXACT_FLOAT_INT
+        elif value_type is float:
+            value_kind = _FLOAT
+        elif value_type is bool:
+            value_kind = _BOOL
+        else:
+            return _OBJECT, large_int
+        kind = value_kind if kind is None else _merge_kinds(kind, value_kind)
+        if kind == _OBJECT:
+            return _OBJECT, large_int
+    return _INT if kind is None else kind, large_int
+
+
+class ColumnBuffer:
+    """
+        Growable typed buffer holding values of one result column. Buffer is preallocated with capacity
+        and doubled when it's full. Ints and floats are kept in array.array (or numpy array), bools in list
+        (or numpy bool array), any other values or mix of bools with numbers widen buffer to objects
+        (list or numpy object array). Ints above 2**53 mixed with floats are kept as objects, so they are never rounded
+    """
+    def __init__(self, capacity: int = 1024, use_numpy: bool = False):
+        # bools are subclass of int, they are replaced with None, so type validation rejects them
+        data = {"capacity": None if type(capacity) is bool else capacity}
+        constraints = {"capacity": {Constraint.IS_TYPE: int}}
+        validate_json_data(data, constraints)
+        if capacity <= 0:
+            raise ValueError("Capacity has to be greater than 0")
+
+        self.capacity = capacity
+        self.use_numpy = use_numpy
+        self.size = 0
+        self.kind: int | None = None
+        self.large_int = False
+        self.data: Any = None
+
+    def _is_list(self, kind: int) -> bool:
+        return not self.use_numpy and kind not in _ARRAY_TYPECODES
+
+    def _empty(self, kind: int, length: int) -> Any:
+        if self.use_numpy:
+            return numpy.empty(length, dtype=_NUMPY_DTYPES[kind])
+        if self._is_list(kind):
+            return [None] * length
+        return array(_ARRAY_TYPECODES[kind], bytes(array(_ARRAY_TYPECODES[kind]).itemsize * length))
+
+    def _widen(self, kind: int) -> None:
+        """ Converts already stored values to wider kind """
+        if self.use_numpy:
+            self.data = self.data.astype(_NUMPY_DTYPES[kind])
+        elif self._is_list(self.kind):
+            # bools are already stored in list
+            pass
+        elif kind == _OBJECT:
+            self.data = self.data[:self.size].tolist() + [None] * (self.capacity - self.size)
+        else:
+            self.data = array(_ARRAY_TYPECODES[kind], self.data)
+        self.kind = kind
+
+    def _reserve(self, required: int) -> None:
+        """ Grows preallocated buffer in place by doubling its capacity until required size fits """
+        if required <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < required:
+            capacity *= 2
+        if self.use_numpy:
+            self.data.resize(capacity, refcheck=False)
+        else:
+            self.data.extend(repeat(None if self._is_list(self.kind) else 0, capacity - self.capacity))
+        self.capacity = capacity
+
+    def _fill(self, values: list) -> None:
+        """ Writes values right after already stored ones """
+        end = self.size + len(values)
+        if self._is_list(self.kind):
+            self.data[self.size:end] = values
+        elif self.kind != _OBJECT:
+            # chunk is converted before assignment, so buffer is untouched if any int doesn't fit in 64 bits
+            self.data[self.size:end] = numpy.array(values, dtype=self.data.dtype) if self.use_numpy \
+                else array(self.data.typecode, values)
+        else:
+            # values are assigned one by one, numpy would treat sequences (e.g. array columns) as another dimension
+            for index, value in enumerate(values, self.size):
+                self.data[index] = value
+
+    def extend(self, values: list) -> None:
+        """ Appends chunk of values, widening buffer kind if chunk doesn't fit in current one """
+        kind, large_int = _kind_of(values)
+        self.large_int = self.large_int or large_int
+        if self.kind is not None:
+            kind = _merge_kinds(kind, self.kind)
+        if kind == _FLOAT and self.large_int:
+            kind = _OBJECT
+
+        if self.kind is None:
+            self.data = self._empty(kind, self.capacity)
+            self.kind = kind
+        elif kind != self.kind:
+            self._widen(kind)
+
+        self._reserve(self.size + len(values))
+        try:
+            self._fill(values)
+        except OverflowError:
+            # ints that exceed 64 bits are stored as python objects
+            self._widen(_OBJECT)
+            self._fill(values)
+        self.size += len(values)
+
+    def finalize(self) -> Any:
+        """
+            Returns stored values trimmed to their real size. Type of column without values is unknown,
+            so it's returned as empty list (or empty numpy object array)
+        """
+        if self.kind is None:
+            self.data = self._empty(_OBJECT, 0)
+        elif self.use_numpy:
+            self.data.resize(self.size, refcheck=False)
+        else:
+            del self.data[self.size:]
+        return self.data
+
+
+def _column_names_from_select(select_: str) -> list[str]:
+    """ Derives column names from select statement: 'id, t.name, count(*) as total' -> ['id', 'name', 'total'] """
+    expressions, depth, current = [], 0, ""
+    for char in select_:
+        if char == "," and depth == 0:
+            expressions.append(current)
+            current = ""
+            continue
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        current += char
+    expressions.append(current)
+
+    names = []
+    for expression in expressions:
+        tokens = expression.split()
+        if len(tokens) >= 3 and tokens[-2].lower() == "as":
+            names.append(tokens[-1])
+        else:
+            names.append(expression.strip().split(".")[-1])
+    return names
+
+
+def fetch_columns(query: Query, connection: Any, chunk_size: int = 1000, use_numpy: bool | None = None) -> dict[str, Any]:
+    """
+        Executes query on DB-API connection and materializes result as columns: {<column_name>: <values>, ...}.
+        Rows are fetched in fetchmany chunks and written straight into ColumnBuffers, so full list of rows is never created.
+        Numpy arrays are used when numpy is installed (unless use_numpy is False), array.array/list otherwise.
+        Columns of empty result are returned as empty lists (or empty numpy object arrays)
+    """
+    # bools are subclass of int, they are replaced with None, so type validation rejects them
+    data = {"chunk_size": None if type(chunk_size) is bool else chunk_size}
+    constraints = {"chunk_size": {Constraint.IS_TYPE: int}}
+    validate_json_data(data, constraints)
+    if chunk_size <= 0:
+        raise ValueError("Chunk size has to be greater than 0")
+
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    elif use_numpy and numpy is None:
+        raise ImportError("numpy is required to materialize columns as numpy arrays")
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query.parse())
+        if cursor.description is not None:
+            names = [description[0] for description in cursor.description]
+        else:
+            names = _column_names_from_select(query.select_)
+        if len(set(names)) != len(names):
+            raise ValueError("Column names have to be unique, use aliases in select statement")
+
+        buffers = [ColumnBuffer(capacity=chunk_size, use_numpy=use_numpy) for _ in names]
+        while rows := cursor.fetchmany(chunk_size):
+            for buffer, values in zip(buffers, zip(*rows)):
+                buffer.extend(list(values))
+    finally:
+        cursor.close()
+
+    return {name: buffer.finalize() for name, buffer in zip(names, buffers)}
@@ -0,0 +1,224 @@
+import atexit
+import heapq
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Callable
+
+from easyvalid_data_validator.constraints import Constraint
+from easyvalid_data_validator.validator import validate_json_data
+
+from easyquery_query_builder.queries.query import Query
+
+logger = logging.getLogger(__name__)
+
+# upper bounds (in seconds) of latency histogram buckets, last bucket holds everything slower
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# string literals ('...') and double-quoted identifiers ("..."), whichever starts first
+_QUOTED = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(fragment: str) -> str:
+    """ Normalizes part of statement that is outside of quotes """
+    return _WHITESPACE.sub(" ", _NUMBER_LITERAL.sub("?", fragment)).lower()
+
+
+def fingerprint(statement: str) -> str:
+    """
+        Normalizes literals of sql statement, double-quoted identifiers are kept untouched:
+        "select * from cars where id in (1, 2) and name = 'a'" -> 'select * from cars where id in (?) and name = ?'
+    """
+    parts, position = [], 0
+    for match in _QUOTED.finditer(statement):
+        parts.append(_normalize(statement[position:match.start()]))
+        parts.append("?" if match.group().startswith("'") else match.group())
+        position = match.end()
+    parts.append(_normalize(statement[position:]))
+    return _IN_LIST.sub("(?)", "".join(parts)).strip()
+
+
+class QueryStats:
+    """ Aggregated statistics of all sampled executions of queries with same fingerprint """
+    def __init__(self, fingerprint_: str):
+        self.fingerprint = fingerprint_
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.call_sites: Counter[str] = Counter()
+
+    def record(self, elapsed: float, rows: int, call_site: str) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.rows += rows
+        self.histogram[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        self.call_sites[call_site] += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "total_time": self.total_time,
+            "mean_time": self.total_time / self.count if self.count else 0.0,
+            "max_time": self.max_time,
+            "rows": self.rows,
+            "histogram": dict(zip([*map(str, LATENCY_BUCKETS), "inf"], self.histogram)),
+            "call_sites": dict(self.call_sites)
+        }
+
+
+class QueryProfiler:
+    """
+        Optional execution wrapper that samples executed queries and records their fingerprint, wall time,
+        returned rows and call site. Keeps top_k slowest executions, latency histograms per fingerprint
+        and periodically writes json report to report_path. Report is written in background thread
+        and write errors are only logged, so profiler never breaks query execution.
+        Final report is written by close(), which is also called at interpreter exit when report_path is provided
+    """
+    def __init__(self, sample_rate: float = 1.0, top_k: int = 10, report_path: str | None = None,
+                 report_interval: float = 60.0, clock: Callable[[], float] = time.perf_counter):
+        # ints are accepted as floats, bools are subclass of int, they are replaced with None, so type validation rejects them
+        sample_rate = float(sample_rate) if type(sample_rate) is int else sample_rate
+        report_interval = float(report_interval) if type(report_interval) is int else report_interval
+        data = {"sample_rate": sample_rate, "top_k": None if type(top_k) is bool else top_k, "report_interval": report_interval}
+        constraints = {
+            "sample_rate": {Constraint.IS_TYPE: float},
+            "top_k": {Constraint.IS_TYPE: int},
+            "report_interval": {Constraint.IS_TYPE: float}
+        }
+        validate_json_data(data, constraints)
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("Sample rate has to be between 0 and 1")
+        if top_k <= 0:
+            raise ValueError("Top k has to be greater than 0")
+
+        self.sample_rate = sample_rate
+        self.top_k = top_k
+        self.report_path = report_path
+        self.report_interval = report_interval
+        self.clock = clock
+        self.stats: dict[str, QueryStats] = {}
+        self._slowest: list[tuple[float, int, dict[str, Any]]] = []
+        self._sequence = 0
+        self._last_report = clock()
+        self._random = random.Random()
+        self._lock = threading.Lock()
+        self._report_thread: threading.Thread | None = None
+        self._write_lock = threading.Lock()
+        if report_path is not None:
+            atexit.register(self.close)
+
+    def execute(self, query: Query, connection: Any) -> list[tuple]:
+        """ Executes query on DB-API connection and returns all rows, execution is recorded if it's sampled """
+        statement = query.parse()
+        if self.sample_rate < 1.0 and self._random.random() >= self.sample_rate:
+            return self._run(statement, connection)
+
+        caller = sys._getframe(1)
+        call_site = f"{caller.f_code.co_filename}:{caller.f_lineno} in {caller.f_code.co_name}"
+        start = self.clock()
+        rows = self._run(statement, connection)
+        self.record(statement, self.clock() - start, len(rows), call_site)
+        return rows
+
+    @staticmethod
+    def _run(statement: str, connection: Any) -> list[tuple]:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(statement)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def record(self, statement: str, elapsed: float, rows: int, call_site: str) -> None:
+        """ Records single execution, starts report writing if report_interval has passed since the last one """
+        key = fingerprint(statement)
+        with self._lock:
+            if key not in self.stats:
+                self.stats[key] = QueryStats(key)
+            self.stats[key].record(elapsed, rows, call_site)
+
+            # min-heap of top_k slowest executions, the fastest of them is replaced by slower one
+            self._sequence += 1
+            entry = (elapsed, self._sequence, {"fingerprint": key, "time": elapsed, "rows": rows, "call_site": call_site})
+            if len(self._slowest) < self.top_k:
+                heapq.heappush(self._slowest, entry)
+            elif elapsed > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+            report_due = self.report_path is not None and self.clock() - self._last_report >= self.report_interval \
+                and (self._report_thread is None or not self._report_thread.is_alive())
+            if report_due:
+                self._last_report = self.clock()
+                self._report_thread = threading.Thread(target=self._write_periodic_report, daemon=True)
+                self._report_thread.start()
+
+    def _write_periodic_report(self) -> None:
+        try:
+            self.write_report()
+        except OSError:
+            logger.exception("Query profiler report couldn't be written to %s", self.report_path)
+
+    def flush(self) -> None:
+        """ Waits until report that is being written in background is finished """
+        report_thread = self._report_thread
+        if report_thread is not None:
+            report_thread.join()
+
+    def close(self) -> None:
+        """ Waits for pending report and writes the final one, so executions recorded since the last report are not lost """
+        atexit.unregister(self.close)
+        self.flush()
+        if self.report_path is not None:
+            self._write_periodic_report()
+
+    def slowest(self) -> list[dict[str, Any]]:
+        """ Returns top_k slowest recorded executions, the slowest first """
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._slowest, reverse=True)]
+
+    def report(self) -> dict[str, Any]:
+        """ Creates snapshot of all collected statistics """
+        slowest = self.slowest()
+        with self._lock:
+            queries = [stats.to_dict() for stats in self.stats.values()]
+        return {
+            "sample_rate": self.sample_rate,
+            "slowest": slowest,
+            "queries": sorted(queries, key=lambda stats: stats["total_time"], reverse=True)
+        }
+
+    def write_report(self, path: str | None = None) -> None:
+        """
+            Writes report as json to provided path or to report_path. Report is written to temporary file
+            in the same directory and then moved in place, so readers never see partially written report
+        """
+        path = path or self.report_path
+        if path is None:
+            raise ValueError("Report path has to be provided")
+        content = json.dumps(self.report(), indent=4)
+
+        with self._write_lock:
+            directory, name = os.path.split(os.path.abspath(path))
+            descriptor, temporary_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(descriptor, "w") as report_file:
+                    report_file.write(content)
+                os.replace(temporary_path, path)
+            except BaseException:
+                os.remove(temporary_path)
+                raise
@@ -1,4 +1,5 @@
 import logging
+import sqlite3
 import pytest
 
 
@@ -143,3 +144,24 @@ def valid_select_from_and_invalid_join_argument(request):
 # ----------------------------------------------------------------------
 # / READ_QUERY_WITH_JOIN
 # ----------------------------------------------------------------------
+
+# ----------------------------------------------------------------------
+# EXECUTION
+# ----------------------------------------------------------------------
+@pytest.fixture
+def teams_connection():
+    """ In-memory sqlite3 database with teams table: id integer, name text, budget real (20000 records) """
+    connection = sqlite3.connect(":memory:")
+    connection.execute("create table teams (id integer, name text, budget real)")
+    connection.executemany("insert into teams values (?, ?, ?)",
+                           ((i, f"team_{i % 10}", i * 1.5) for i in range(20000)))
+    yield connection
+    connection.close()
+
+@pytest.fixture
+def numeric_teams_query():
+    """ ReadQuery -> 'select id, budget from teams' """
+    return ReadQuery(select_="id, budget", from_="teams")
+# ----------------------------------------------------------------------
+# / EXECUTION
+# ----------------------------------------------------------------------
@@ -0,0 +1,201 @@
+import sqlite3
+import tracemalloc
+from array import array
+
+import pytest
+from easyvalid_data_validator.customexceptions.common import ValidationError
+
+from easyquery_query_builder.execution.columnar import ColumnBuffer, fetch_columns, _column_names_from_select
+from easyquery_query_builder.queries.read_query import ReadQuery
+
+
+class TestColumnBuffer:
+    def test_int_values_are_stored_in_int_array(self) -> None:
+        buffer = ColumnBuffer()
+        buffer.extend([1, 2])
+        buffer.extend([3])
+        assert buffer.finalize() == array("q", [1, 2, 3])
+
+    def test_buffer_is_widened_to_floats(self) -> None:
+        buffer = ColumnBuffer()
+        buffer.extend([1, 2])
+        buffer.extend([2.5])
+        assert buffer.finalize() == array("d", [1.0, 2.0, 2.5])
+
+    @pytest.mark.parametrize("values", [[3, None], [3, "c"], [3, 2 ** 70]])
+    def test_buffer_is_widened_to_objects(self, values) -> None:
+        buffer = ColumnBuffer()
+        buffer.extend([1, 2])
+        buffer.extend(values)
+        assert buffer.finalize() == [1, 2, *values]
+
+    @pytest.mark.parametrize("chunks", [
+        [[2 ** 62, 2 ** 62 + 1], [1.5]],
+        [[1.5], [2 ** 62 + 1, 3]],
+        [[2 ** 62, 2 ** 62 + 1, 1.5]]
+    ])
+    @pytest.mark.parametrize("use_numpy", [False, True])
+    def test_large_ints_mixed_with_floats_are_not_rounded(self, chunks, use_numpy) -> None:
+        if use_numpy:
+            pytest.importorskip("numpy")
+        buffer = ColumnBuffer(capacity=2, use_numpy=use_numpy)
+        for chunk in chunks:
+            buffer.extend(chunk)
+        result = list(buffer.finalize())
+        assert result == [value for chunk in chunks for value in chunk]
+        assert [type(value) for value in result] == [type(value) for chunk in chunks for value in chunk]
+
+    @pytest.mark.parametrize("chunks", [
+        [[True, False], [True]],
+        [[True], [1, 2]],
+        [[1.5], [False]],
+        [[2, True, 0.5]]
+    ])
+    @pytest.mark.parametrize("use_numpy", [False, True])
+    def test_bools_are_not_coerced_to_numbers(self, chunks, use_numpy) -> None:
+        if use_numpy:
+            pytest.importorskip("numpy")
+        buffer = ColumnBuffer(capacity=1, use_numpy=use_numpy)
+        for chunk in chunks:
+            buffer.extend(chunk)
+        result = buffer.finalize()
+        result = result.tolist() if use_numpy else result
+        values = [value for chunk in chunks for value in chunk]
+        assert result == values
+        assert [type(value) for value in result] == [type(value) for value in values]
+
+    def test_numpy_bool_column(self) -> None:
+        numpy = pytest.importorskip("numpy")
+        buffer = ColumnBuffer(use_numpy=True)
+        buffer.extend([True, False])
+        assert buffer.finalize().dtype == numpy.bool_
+
+    def test_buffer_is_preallocated_and_grows_by_doubling(self) -> None:
+        buffer = ColumnBuffer(capacity=2)
+        buffer.extend([1])
+        assert len(buffer.data) == 2
+        buffer.extend([2, 3])
+        assert buffer.capacity == 4
+        assert len(buffer.data) == 4
+        assert buffer.finalize() == array("q", [1, 2, 3])
+
+    def test_empty_buffer(self) -> None:
+        assert ColumnBuffer().finalize() == []
+
+    def test_buffer_with_invalid_capacity_type(self) -> None:
+        with pytest.raises(ValidationError) as e:
+            ColumnBuffer(capacity=True)
+        assert e.value.args[0] == {"capacity": ["Invalid type - isn't same type like compare type"]}
+
+    @pytest.mark.parametrize("capacity", [0, -1])
+    def test_buffer_with_not_positive_capacity(self, capacity) -> None:
+        with pytest.raises(ValueError) as e:
+            ColumnBuffer(capacity=capacity)
+        assert e.value.args[0] == "Capacity has to be greater than 0"
+
+    def test_numpy_buffer_grows_over_capacity(self) -> None:
+        numpy = pytest.importorskip("numpy")
+        buffer = ColumnBuffer(capacity=2, use_numpy=True)
+        buffer.extend([1, 2, 3])
+        buffer.extend([4.5])
+        result = buffer.finalize()
+        assert result.dtype == numpy.float64
+        assert result.tolist() == [1.0, 2.0, 3.0, 4.5]
+
+    @pytest.mark.parametrize("values", [["a", None], [[1, 2], [3, 4]], [(1, 2), "b"], [2 ** 70, 1]])
+    def test_numpy_buffer_with_object_values(self, values) -> None:
+        numpy = pytest.importorskip("numpy")
+        buffer = ColumnBuffer(capacity=1, use_numpy=True)
+        buffer.extend(values)
+        buffer.extend(values)
+        result = buffer.finalize()
+        assert result.dtype == numpy.dtype(object)
+        assert result.shape == (4,)
+        assert list(result) == [*values, *values]
+
+
+class TestFetchColumns:
+    # ----------------------------------------------------------------------
+    # Valid cases
+    # ----------------------------------------------------------------------
+    def test_fetch_columns_with_cursor_description_names(self, teams_connection) -> None:
+        query = ReadQuery(select_="id, name, budget as money", from_="teams", where_="id < 3")
+        result = fetch_columns(query, teams_connection, chunk_size=2, use_numpy=False)
+        assert result == {
+            "id": array("q", [0, 1, 2]),
+            "name": ["team_0", "team_1", "team_2"],
+            "money": array("d", [0.0, 1.5, 3.0])
+        }
+
+    def test_fetch_columns_with_numpy(self, teams_connection) -> None:
+        numpy = pytest.importorskip("numpy")
+        query = ReadQuery(select_="id, name, budget", from_="teams", where_="id < 3")
+        result = fetch_columns(query, teams_connection, chunk_size=2, use_numpy=True)
+        assert [column.dtype for column in result.values()] == [numpy.int64, numpy.dtype(object), numpy.float64]
+        assert {name: column.tolist() for name, column in result.items()} == {
+            "id": [0, 1, 2],
+            "name": ["team_0", "team_1", "team_2"],
+            "budget": [0.0, 1.5, 3.0]
+        }
+
+    @pytest.mark.parametrize("use_numpy", [False, True])
+    def test_fetch_columns_keeps_large_ints_mixed_with_floats(self, use_numpy) -> None:
+        if use_numpy:
+            pytest.importorskip("numpy")
+        connection = sqlite3.connect(":memory:")
+        connection.execute("create table ids (id)")
+        connection.executemany("insert into ids values (?)", [(2 ** 62,), (2 ** 62 + 1,), (1.5,)])
+        result = fetch_columns(ReadQuery(select_="id", from_="ids"), connection, use_numpy=use_numpy)
+        connection.close()
+        assert list(result["id"]) == [2 ** 62, 2 ** 62 + 1, 1.5]
+
+    def test_fetch_columns_without_records(self, teams_connection) -> None:
+        query = ReadQuery(select_="id", from_="teams", where_="id < 0")
+        assert fetch_columns(query, teams_connection, use_numpy=False) == {"id": []}
+
+    def test_fetch_columns_peak_memory_is_lower_than_fetchall(self, teams_connection, numeric_teams_query) -> None:
+        tracemalloc.start()
+        cursor = teams_connection.cursor()
+        cursor.execute(numeric_teams_query.parse())
+        rows = cursor.fetchall()
+        expected = {"id": array("q", [row[0] for row in rows]), "budget": array("d", [row[1] for row in rows])}
+        del rows
+        cursor.close()
+        _, fetchall_peak = tracemalloc.get_traced_memory()
+
+        tracemalloc.reset_peak()
+        result = fetch_columns(numeric_teams_query, teams_connection, use_numpy=False)
+        _, fetch_columns_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert result == expected
+        assert fetch_columns_peak < fetchall_peak / 2
+
+    # ----------------------------------------------------------------------
+    # Invalid cases
+    # ----------------------------------------------------------------------
+    def test_fetch_columns_with_duplicated_column_names(self, teams_connection) -> None:
+        with pytest.raises(ValueError) as e:
+            fetch_columns(ReadQuery(select_="id, id", from_="teams"), teams_connection)
+        assert e.value.args[0] == "Column names have to be unique, use aliases in select statement"
+
+    @pytest.mark.parametrize("chunk_size", ["10", True])
+    def test_fetch_columns_with_invalid_chunk_size_type(self, teams_connection, numeric_teams_query, chunk_size) -> None:
+        with pytest.raises(ValidationError) as e:
+            fetch_columns(numeric_teams_query, teams_connection, chunk_size=chunk_size)
+        assert e.value.args[0] == {"chunk_size": ["Invalid type - isn't same type like compare type"]}
+
+    def test_fetch_columns_with_not_positive_chunk_size(self, teams_connection, numeric_teams_query) -> None:
+        with pytest.raises(ValueError) as e:
+            fetch_columns(numeric_teams_query, teams_connection, chunk_size=0)
+        assert e.value.args[0] == "Chunk size has to be greater than 0"
+
+
+class TestColumnNamesFromSelect:
+    @pytest.mark.parametrize("select_, names", [
+        ("id", ["id"]),
+        ("id, t.name", ["id", "name"]),
+        ("count(*) as total, coalesce(a, b) AS value", ["total", "value"])
+    ])
+    def test_column_names_from_select(self, select_, names) -> None:
+        assert _column_names_from_select(select_) == names
@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+
+import pytest
+from easyvalid_data_validator.customexceptions.common import ValidationError
+
+from easyquery_query_builder.execution.profiler import QueryProfiler, fingerprint
+from easyquery_query_builder.queries.read_query import ReadQuery
+from easyquery_query_builder.queries.read_query_with_joins import ReadQueryWithJoins
+
+
+class TestFingerprint:
+    @pytest.mark.parametrize("statement, expected", [
+        ("select * from teams where id > 10", "select * from teams where id > ?"),
+        ("select * from teams where name = 'team_1' and budget < 1.5", "select * from teams where name = ? and budget < ?"),
+        ("select * from teams where id in (1, 2,3)", "select * from teams where id in (?)"),
+        ("select t1.id from teams_2  where name = 'it''s'", "select t1.id from teams_2 where name = ?"),
+        ("select * from teams where budget = 1e10 or budget < 2.5E-3", "select * from teams where budget = ? or budget < ?"),
+        ('select "Col 1" from teams where "Col 1" = \'say "1"\'', 'select "Col 1" from teams where "Col 1" = ?')
+    ])
+    def test_fingerprint_normalizes_literals(self, statement, expected) -> None:
+        assert fingerprint(statement) == expected
+
+    def test_fingerprint_of_read_query_with_joins(self) -> None:
+        query = ReadQueryWithJoins(select_="*", from_="teams", where_="t.id = 5", joins_=[["teams", "t", "t.id = teams.id"]])
+        assert fingerprint(query.parse()) == "select * from teams join teams as t on t.id = teams.id where t.id = ?"
+
+
+class TestQueryProfiler:
+    # ----------------------------------------------------------------------
+    # Valid cases
+    # ----------------------------------------------------------------------
+    def test_execute_records_fingerprint_rows_and_call_site(self, teams_connection) -> None:
+        profiler = QueryProfiler()
+        for limit in (3, 5):
+            rows = profiler.execute(ReadQuery(select_="id", from_="teams", where_=f"id < {limit}"), teams_connection)
+            assert len(rows) == limit
+
+        stats = profiler.report()["queries"]
+        assert len(stats) == 1
+        assert stats[0]["fingerprint"] == "select id from teams where id < ?"
+        assert stats[0]["count"] == 2
+        assert stats[0]["rows"] == 8
+        assert sum(stats[0]["histogram"].values()) == 2
+        [call_site] = stats[0]["call_sites"]
+        assert call_site.startswith(__file__)
+        assert call_site.endswith("in test_execute_records_fingerprint_rows_and_call_site")
+
+    def test_execute_without_sampling(self, teams_connection) -> None:
+        profiler = QueryProfiler(sample_rate=0.0)
+        rows = profiler.execute(ReadQuery(select_="id", from_="teams", where_="id < 3"), teams_connection)
+        assert rows == [(0,), (1,), (2,)]
+        assert profiler.report() == {"sample_rate": 0.0, "slowest": [], "queries": []}
+
+    def test_slowest_keeps_top_k_executions(self) -> None:
+        profiler = QueryProfiler(top_k=2)
+        for elapsed in (0.2, 0.003, 7.0, 0.05):
+            profiler.record(f"select * from teams where id = {elapsed}", elapsed, 1, "site")
+        assert [entry["time"] for entry in profiler.slowest()] == [7.0, 0.2]
+        assert profiler.report()["queries"][0]["histogram"] == {
+            "0.001": 0, "0.005": 1, "0.01": 0, "0.05": 1, "0.1": 0, "0.5": 1, "1.0": 0, "5.0": 0, "inf": 1
+        }
+
+    def test_report_is_written_periodically(self, tmp_path) -> None:
+        now = [0.0]
+        report_path = tmp_path / "report.json"
+        profiler = QueryProfiler(report_path=str(report_path), report_interval=10.0, clock=lambda: now[0])
+
+        profiler.record("select * from teams", 0.5, 1, "site")
+        assert not report_path.exists()
+
+        now[0] = 10.0
+        profiler.record("select * from teams", 1.5, 2, "site")
+        profiler.flush()
+        report = json.loads(report_path.read_text())
+        assert report["queries"][0]["count"] == 2
+        assert report["queries"][0]["max_time"] == 1.5
+        assert report["slowest"][0]["time"] == 1.5
+        profiler.close()
+
+    def test_execute_with_not_writable_report_path(self, teams_connection, tmp_path, caplog) -> None:
+        report_path = tmp_path / "not_existing_dir" / "report.json"
+        profiler = QueryProfiler(report_path=str(report_path), report_interval=0)
+        rows = profiler.execute(ReadQuery(select_="id", from_="teams", where_="id < 2"), teams_connection)
+        profiler.flush()
+        assert rows == [(0,), (1,)]
+        assert not report_path.exists()
+        assert f"Query profiler report couldn't be written to {report_path}" in caplog.text
+        profiler.close()
+
+    def test_write_report_replaces_file_atomically(self, tmp_path) -> None:
+        report_path = tmp_path / "report.json"
+        report_path.write_text("old report")
+        profiler = QueryProfiler()
+        profiler.record("select * from teams", 0.5, 1, "site")
+
+        threads = [threading.Thread(target=profiler.write_report, args=(str(report_path),)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert json.loads(report_path.read_text())["queries"][0]["count"] == 1
+        assert os.listdir(tmp_path) == ["report.json"]
+
+    def test_close_writes_final_report(self, tmp_path) -> None:
+        report_path = tmp_path / "report.json"
+        profiler = QueryProfiler(report_path=str(report_path))
+        profiler.record("select * from teams", 0.5, 3, "site")
+        assert not report_path.exists()
+
+        profiler.close()
+        assert json.loads(report_path.read_text())["queries"][0]["rows"] == 3
+
+    def test_close_with_not_writable_report_path(self, tmp_path, caplog) -> None:
+        report_path = tmp_path / "not_existing_dir" / "report.json"
+        QueryProfiler(report_path=str(report_path)).close()
+        assert f"Query profiler report couldn't be written to {report_path}" in caplog.text
+
+    def test_profiler_with_int_arguments(self) -> None:
+        profiler = QueryProfiler(sample_rate=1, report_interval=30)
+        assert profiler.sample_rate == 1.0
+        assert profiler.report_interval == 30.0
+
+    # ----------------------------------------------------------------------
+    # Invalid cases
+    # ----------------------------------------------------------------------
+    @pytest.mark.parametrize("arguments, message", [
+        ({"sample_rate": 1.5}, "Sample rate has to be between 0 and 1"),
+        ({"top_k": 0}, "Top k has to be greater than 0")
+    ])
+    def test_profiler_with_invalid_values(self, arguments, message) -> None:
+        with pytest.raises(ValueError) as e:
+            QueryProfiler(**arguments)
+        assert e.value.args[0] == message
+
+    @pytest.mark.parametrize("argument", ["sample_rate", "top_k", "report_interval"])
+    @pytest.mark.parametrize("value", ["0.5", True])
+    def test_profiler_with_invalid_argument_type(self, argument, value) -> None:
+        with pytest.raises(ValidationError) as e:
+            QueryProfiler(**{argument: value})
+        assert e.value.args[0] == {argument: ["Invalid type - isn't same type like compare type"]}
+
+    def test_write_report_without_path(self) -> None:
+        with pytest.raises(ValueError) as e:
+            QueryProfiler().write_report()
+        assert e.value.args[0] == "Report path has to be provided"